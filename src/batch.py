@@ -0,0 +1,88 @@
+"""
+Batch mode: scores and builds decks for many ManaBox export folders while
+paying for the Scryfall bulk file and every EDHREC page only once.
+"""
+import os
+import time
+
+import src.main as pipeline
+import src.externals as externals
+from loaders import cache
+from src.collection import load_bulk_index
+from src.synergy_index import SynergyIndex
+
+
+def _output_names(export_dirs):
+    """One output folder name per export dir, de-duplicated."""
+    names = []
+    for directory in export_dirs:
+        base = os.path.basename(os.path.normpath(directory)) or "collection"
+        name = base
+        n = 2
+        while name in names:
+            name = f"{base}_{n}"
+            n += 1
+        names.append(name)
+    return names
+
+
+def prefetch(commander_names, pages, throttle=0.1):
+    """Fetches each commander page and its top themes into 'pages'."""
+    total = len(commander_names)
+    for i, name in enumerate(commander_names):
+        print(f"[{i+1}/{total}] Prefetching {name}...")
+        edh_data = pages.fetch_edhrec_data(name)
+        if not edh_data or not edh_data.get('themes'):
+            continue
+        for theme in edh_data['themes'][:10]:
+            before = pages.requests_made
+            pages.fetch_theme_cards(theme['slug'])
+            # API Throttling (only when we actually hit the network)
+            if pages.requests_made > before:
+                time.sleep(throttle)
+
+
+def run_batch(export_dirs, output_root):
+    print("--- 1. BATCH SETUP ---")
+    pipeline.load_rules()
+
+    # Card database is parsed once and shared by every collection
+    bulk_index = load_bulk_index(pipeline.BULK_JSON_PATH) or {}
+
+    collections = []
+    for directory in export_dirs:
+        collection = pipeline.load_collection_from_directory(directory)
+        collection.enrich_from_bulk_index(bulk_index)
+        collections.append(collection)
+
+    # Union of commanders worth scanning across all collections
+    theme_sizes = cache.load_cache(pipeline.THEME_SIZE_CACHE)
+    commander_names = set()
+    for collection in collections:
+        for cmd in pipeline.find_commanders(collection,
+                                            pipeline.VICTORY_THRESHOLD,
+                                            theme_sizes):
+            commander_names.add(cmd['Name'])
+
+    print(f"\n--- 2. FETCHING {len(commander_names)} COMMANDERS ---")
+    pages = externals.EdhrecCache()
+    prefetch(sorted(commander_names), pages)
+    print(f"Made {pages.requests_made} EDHREC requests.")
+
+    # Theme lists are shared, but ownership differs per collection, so the
+    # index is not synced to any of them (--unlocks syncs on demand)
+    index = SynergyIndex.load(pipeline.SYNERGY_INDEX_PATH)
+
+    for directory, name, collection in zip(export_dirs,
+                                           _output_names(export_dirs),
+                                           collections):
+        print(f"\n=== COLLECTION: {directory} ===")
+        # Everything is cached now, no throttling needed
+        candidates = pipeline.run_analysis_pipeline(collection,
+                                                    source=pages,
+                                                    throttle=0,
+                                                    index=index)
+        pipeline.build_winners(candidates, collection,
+                               os.path.join(output_root, name))
+
+    index.save(pipeline.SYNERGY_INDEX_PATH)
@@ -0,0 +1,147 @@
+import sys
+
+
+# --- CARD RECORD ---
+# Maps the ManaBox CSV / Scryfall keys used across the code to slot names.
+KEY_TO_SLOT = {
+    'Name': 'name',
+    'Set code': 'set_code',
+    'Set name': 'set_name',
+    'Collector number': 'collector_number',
+    'Quantity': 'quantity',
+    'Foil': 'foil',
+    'Rarity': 'rarity',
+    'Scryfall ID': 'scryfall_id',
+    'ManaBox ID': 'manabox_id',
+    'Purchase price': 'purchase_price',
+    'Purchase price currency': 'price_currency',
+    'Misprint': 'misprint',
+    'Altered': 'altered',
+    'Condition': 'condition',
+    'Language': 'language',
+    'color_identity': 'color_identity',
+    'type_line': 'type_line',
+    'oracle_text': 'oracle_text',
+    'cmc': 'cmc',
+    'edhrec_rank': 'edhrec_rank',
+    'mana_cost': 'mana_cost',
+}
+SLOT_TO_KEY = {v: k for k, v in KEY_TO_SLOT.items()}
+
+# Shared tuples so every mono-blue card points at the same ('U',) object
+_identity_pool = {}
+
+
+def _to_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_float(value, default):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _identity(value):
+    key = tuple(value or ())
+    return _identity_pool.setdefault(key, key)
+
+
+# Converters applied on every write, so enrichment gets typed fields too
+_CONVERTERS = {
+    'quantity': lambda v: _to_int(v, 1),
+    'cmc': lambda v: _to_float(v, 0.0),
+    'edhrec_rank': lambda v: _to_int(v, 99999),
+    'color_identity': _identity,
+    'set_code': _intern,
+    'set_name': _intern,
+    'rarity': _intern,
+    'foil': _intern,
+    'price_currency': _intern,
+    'misprint': _intern,
+    'altered': _intern,
+    'condition': _intern,
+    'language': _intern,
+    'type_line': _intern,
+    'mana_cost': _intern,
+}
+
+
+class Card:
+    """
+    Compact card record. Behaves like the old row dict ('Name',
+    'type_line', .get(), 'in') so the logic modules don't care, but stores
+    fields in slots with typed numbers and interned strings.
+    Unset slots read as missing keys, just like an unenriched dict.
+    """
+    # Columns we don't know about land in 'extra'
+    __slots__ = tuple(KEY_TO_SLOT.values()) + ('extra',)
+
+    def __init__(self, **fields):
+        self.extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_row(cls, row):
+        card = cls()
+        for key, value in row.items():
+            card[key] = value
+        return card
+
+    def __getitem__(self, key):
+        slot = KEY_TO_SLOT.get(key)
+        if slot is not None:
+            try:
+                return getattr(self, slot)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        slot = KEY_TO_SLOT.get(key)
+        if slot is None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+            return
+        convert = _CONVERTERS.get(slot)
+        setattr(self, slot, convert(value) if convert else value)
+
+    def __contains__(self, key):
+        slot = KEY_TO_SLOT.get(key)
+        if slot is not None:
+            return hasattr(self, slot)
+        return self.extra is not None and key in self.extra
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        found = [SLOT_TO_KEY[s] for s in KEY_TO_SLOT.values()
+                 if hasattr(self, s)]
+        if self.extra:
+            found.extend(self.extra)
+        return found
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"Card({self.to_dict()!r})"
@@ -1,6 +1,23 @@
 import json
 
 
+def load_bulk_index(bulk_json_path):
+    """
+    Loads Scryfall 'Oracle Cards' JSON into a lowercase name index.
+    Returns None if the file is missing.
+    """
+    print(f"Loading Scryfall Bulk Data from {bulk_json_path}...")
+    try:
+        with open(bulk_json_path, 'r', encoding='utf-8') as f:
+            scryfall_data = json.load(f)
+    except FileNotFoundError:
+        print("Error: Bulk JSON file not found. Skipping enrichment.")
+        return None
+
+    # Create an index of the bulk data for speed
+    return {item['name'].lower(): item for item in scryfall_data}
+
+
 # --- COLLECTION CLASS ---
 class Collection:
     def __init__(self, cards):
@@ -14,21 +31,24 @@ class Collection:
         """
         Loads Scryfall 'Oracle Cards' JSON and merges it.
         """
-        print(f"Loading Scryfall Bulk Data from {bulk_json_path}...")
-        try:
-            with open(bulk_json_path, 'r', encoding='utf-8') as f:
-                scryfall_data = json.load(f)
-        except FileNotFoundError:
-            print("Error: Bulk JSON file not found. Skipping enrichment.")
+        bulk_index = load_bulk_index(bulk_json_path)
+        if bulk_index is None:
             return
+        self.enrich_from_bulk_index(bulk_index)
 
+    def enrich_from_bulk_index(self, bulk_index, cards=None):
+        """
+        Merges an already loaded bulk index into the collection.
+        Pass 'cards' to only enrich a subset (e.g. freshly loaded rows).
+        """
         print("Merging data...")
         match_count = 0
 
-        # Create a temporary index of the bulk data for speed
-        bulk_index = {item['name'].lower(): item for item in scryfall_data}
+        if cards is None:
+            cards = self._name_index.values()
 
-        for my_card_name, my_card in self._name_index.items():
+        for my_card in cards:
+            my_card_name = my_card.get('Name', '').lower()
             if my_card_name in bulk_index:
                 sf_card = bulk_index[my_card_name]
 
@@ -1,23 +1,62 @@
+from array import array
+
 import requests
 
 
-def fetch_theme_cards(theme_slug):
+def _metrics(card_view):
+    """
+    Synergy (-1..1) and inclusion rate (share of the page's decks playing
+    the card) from one EDHRec cardview.
+    """
+    synergy = card_view.get('synergy') or 0.0
+    inclusion = card_view.get('inclusion') or 0
+    potential = card_view.get('potential_decks') or \
+        card_view.get('num_decks') or 0
+    rate = inclusion / potential if potential else 0.0
+    return float(synergy), float(rate)
+
+
+def _collect(card_lists, target_headers):
+    """
+    Flattens the chosen cardlists into names plus float32 metric arrays
+    aligned with them. A card listed under several headers is kept once.
+    """
+    names = []
+    synergy = array('f')
+    inclusion = array('f')
+    seen = set()
+    for cl in card_lists:
+        if cl.get('header') in target_headers:
+            for card_view in cl.get('cardviews', []):
+                name = card_view['name']
+                if name in seen:
+                    continue
+                seen.add(name)
+                syn, rate = _metrics(card_view)
+                names.append(name)
+                synergy.append(syn)
+                inclusion.append(rate)
+    return names, synergy, inclusion
+
+
+def fetch_theme_data(theme_slug):
     """
-    The new function to fetch the 'Leaf Node' data.
+    Fetches the 'Leaf Node' data: card names plus their synergy and
+    inclusion numbers as compact arrays aligned with the names.
     """
     url = f"https://json.edhrec.com/pages/{theme_slug}.json"
+    empty = {'cards': [], 'synergy': array('f'), 'inclusion': array('f')}
 
     try:
         response = requests.get(url)
         if response.status_code != 200:
-            return []
+            return empty
 
         data = response.json()
         card_lists = data.get('container', {})\
                          .get('json_dict', {})\
                          .get('cardlists', [])
 
-        theme_cards = []
         # We grab High Synergy, Top Cards, Creatures, Instants, etc.
         # to build a robust pool of "Perfect Cards"
         target_headers = ['High Synergy Cards',
@@ -28,16 +67,19 @@ def fetch_theme_cards(theme_slug):
                           'Artifacts',
                           'Enchantments']
 
-        for cl in card_lists:
-            if cl.get('header') in target_headers:
-                for card_view in cl.get('cardviews', []):
-                    theme_cards.append(card_view['name'])
-
-        return theme_cards
+        names, synergy, inclusion = _collect(card_lists, target_headers)
+        return {'cards': names, 'synergy': synergy, 'inclusion': inclusion}
 
     except Exception as e:
         print(f"Error fetching theme {theme_slug}: {e}")
-        return []
+        return empty
+
+
+def fetch_theme_cards(theme_slug):
+    """
+    The new function to fetch the 'Leaf Node' data (names only).
+    """
+    return fetch_theme_data(theme_slug)['cards']
 
 
 def fetch_edhrec_data(card_name):
@@ -75,21 +117,55 @@ def fetch_edhrec_data(card_name):
             .get('json_dict', {})\
             .get('cardlists', [])
 
-        synergy_cards = []
-        for cl in card_lists:
-            # We specifically want "High Synergy" or "Top Cards"
-            if cl['header'] in ['High Synergy Cards', 'Top Cards']:
-                for card_view in cl['cardviews']:
-                    # EDHRec names sometimes have casing issues,
-                    # simpler to clean here
-                    synergy_cards.append(card_view['name'])
+        # We specifically want "High Synergy" or "Top Cards"
+        # The metrics stay aligned with the names, as in fetch_theme_data
+        synergy_cards, synergy, inclusion = _collect(
+            card_lists, ['High Synergy Cards', 'Top Cards'])
 
         return {
             'commander': card_name,
-            'themes': themes,               # The Branches
-            'generic_cards': synergy_cards  # The Root Data
+            'themes': themes,                # The Branches
+            'generic_cards': synergy_cards,  # The Root Data
+            'generic_synergy': synergy,
+            'generic_inclusion': inclusion
         }
 
     except Exception as e:
         print(f"Error parsing EDHRec for {card_name}: {e}")
         return None
+
+
+class EdhrecCache:
+    """
+    Memoizes EDHRec pages so each one is requested at most once.
+    Failed or empty fetches are not kept, so a transient error is retried
+    on the next request instead of sticking for the life of the cache.
+    Exposes the same fetch functions as this module, so it can be passed
+    anywhere the module is used as a data source.
+    """
+
+    def __init__(self):
+        self.commanders = {}
+        self.themes = {}
+        self.requests_made = 0
+
+    def fetch_edhrec_data(self, card_name):
+        if card_name in self.commanders:
+            return self.commanders[card_name]
+        self.requests_made += 1
+        data = fetch_edhrec_data(card_name)
+        if data is not None:
+            self.commanders[card_name] = data
+        return data
+
+    def fetch_theme_data(self, theme_slug):
+        if theme_slug in self.themes:
+            return self.themes[theme_slug]
+        self.requests_made += 1
+        data = fetch_theme_data(theme_slug)
+        if data['cards']:
+            self.themes[theme_slug] = data
+        return data
+
+    def fetch_theme_cards(self, theme_slug):
+        return self.fetch_theme_data(theme_slug)['cards']
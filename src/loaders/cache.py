@@ -0,0 +1,26 @@
+import json
+import os
+
+
+def load_cache(filepath, default=None):
+    """Reads a JSON cache file, returning 'default' if it is missing."""
+    if not os.path.exists(filepath):
+        return {} if default is None else default
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading cache {filepath}: {e}")
+        return {} if default is None else default
+
+
+def save_cache(filepath, data):
+    """Writes a JSON cache file atomically (temp file + rename)."""
+    # Per-process temp name so parallel shards never share a temp file
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, filepath)
+    except Exception as e:
+        print(f"Error saving cache {filepath}: {e}")
@@ -5,9 +5,9 @@ color_map = {'W': 'white',
              'G': 'green'}
 
 
-def _add_non_basics(deck_list, collection, slots_available, commander_name):
+def non_basic_pool(deck_list, collection, commander_name):
     """
-    Scans collection for Valid Non-Basic Lands.
+    Scans collection for Valid Non-Basic Lands, best EDHREC rank first.
     Heuristic: Off-Color Fetches (Polluted Delta in Izzet) are only allowed
     if they are High Rank (< 600). Low rank off-color fetches
     (Panoramas) are banned.
@@ -59,6 +59,14 @@ def _add_non_basics(deck_list, collection, slots_available, commander_name):
 
     # Sort best first
     non_basics.sort(key=lambda x: x.get('edhrec_rank', 99999))
+    return non_basics
+
+
+def _add_non_basics(deck_list, collection, slots_available, commander_name):
+    """
+    Adds the best Valid Non-Basic Lands (see non_basic_pool).
+    """
+    non_basics = non_basic_pool(deck_list, collection, commander_name)
 
     added_count = 0
     log = []
@@ -81,49 +89,36 @@ def _add_non_basics(deck_list, collection, slots_available, commander_name):
     return deck_list, added_count
 
 
-def _fill_basics(deck_list, collection, slots_needed, commander_name):
-    """
-    Fills remaining slots with Basic Lands based on Pip Count.
-    """
-    if slots_needed <= 0:
-        return deck_list
+def card_pips(card):
+    """Colored pip counts of a card's mana cost."""
+    cost = card.get('mana_cost', '')
+    return {c: cost.count(c) for c in color_map}
 
-    pip_counts = {'W': 0, 'U': 0, 'B': 0, 'R': 0, 'G': 0}
-
-    # 1. Count Pips (Only from non-lands in the deck)
-    for name in deck_list:
-        if name == commander_name:
-            continue
-        card = collection._name_index.get(name.lower())
-        if not card:
-            continue
-        if 'land' in card.get('type_line', '').lower():
-            continue  # Don't count land pips
-
-        cost = card.get('mana_cost', '')
-        for c in pip_counts:
-            pip_counts[c] += cost.count(c)
 
+def split_basics(pip_counts, cmd_colors, slots_needed):
+    """
+    Splits 'slots_needed' basics across colors by pip count.
+    Returns ([(basic name, qty), ...], [log lines]).
+    """
+    basics = []
+    log = []
     total_pips = sum(pip_counts.values())
-    cmd_obj = collection._name_index.get(commander_name.lower())
-    cmd_colors = set(cmd_obj.get('color_identity', []))
 
-    # 2. Handle Colorless/No-Pip Decks
+    # Handle Colorless/No-Pip Decks
     if total_pips == 0:
         if not cmd_colors:  # Colorless Commander (Karn/Eldrazi)
-            deck_list.extend(['Wastes'] * slots_needed)
-            return deck_list
+            return [('Wastes', slots_needed)], log
 
         per_color = slots_needed // max(1, len(cmd_colors))
         rem = slots_needed % max(1, len(cmd_colors))
 
         for c in cmd_colors:
-            deck_list.extend([color_map[c]] * per_color)
+            basics.append((color_map[c], per_color))
         if rem > 0:
-            deck_list.extend([color_map[list(cmd_colors)[0]]] * rem)
-        return deck_list
+            basics.append((color_map[list(cmd_colors)[0]], rem))
+        return basics, log
 
-    # 3. Assign Basics
+    # Assign Basics
     sorted_colors = sorted(pip_counts.items(),
                            key=lambda x: x[1],
                            reverse=True)
@@ -142,20 +137,68 @@ def _fill_basics(deck_list, collection, slots_needed, commander_name):
         if basics_added + qty > slots_needed:
             qty = slots_needed - basics_added
 
-        deck_list.extend([color_map[color_code]] * qty)
+        basics.append((color_map[color_code], qty))
         basics_added += qty
-        print(f"      + {qty} {color_map[color_code]}")
+        log.append(f"      + {qty} {color_map[color_code]}")
 
-    # 4. Rounding
+    # Rounding
     remainder = slots_needed - basics_added
     if remainder > 0:
         primary = color_map[sorted_colors[0][0]]
-        deck_list.extend([primary] * remainder)
-        print(f"      + {remainder} {primary} (Rounding)")
+        basics.append((primary, remainder))
+        log.append(f"      + {remainder} {primary} (Rounding)")
+
+    return basics, log
+
+
+def _fill_basics(deck_list, collection, slots_needed, commander_name):
+    """
+    Fills remaining slots with Basic Lands based on Pip Count.
+    """
+    if slots_needed <= 0:
+        return deck_list
+
+    pip_counts = {'W': 0, 'U': 0, 'B': 0, 'R': 0, 'G': 0}
+
+    # 1. Count Pips (Only from non-lands in the deck)
+    for name in deck_list:
+        if name == commander_name:
+            continue
+        card = collection._name_index.get(name.lower())
+        if not card:
+            continue
+        if 'land' in card.get('type_line', '').lower():
+            continue  # Don't count land pips
+
+        for c, count in card_pips(card).items():
+            pip_counts[c] += count
+
+    cmd_obj = collection._name_index.get(commander_name.lower())
+    cmd_colors = set(cmd_obj.get('color_identity', []))
+
+    # 2. Assign Basics
+    basics, log = split_basics(pip_counts, cmd_colors, slots_needed)
+    for name, qty in basics:
+        deck_list.extend([name] * qty)
+    for line in log:
+        print(line)
 
     return deck_list
 
 
+def land_count_for_avg(avg_cmc):
+    """Land count for a deck with this average mana value."""
+    if avg_cmc > 3.8:
+        return 40
+    if avg_cmc > 3.4:
+        return 38
+    if avg_cmc < 2.0:
+        return 33
+    if avg_cmc < 2.4:
+        return 35
+    return 37
+
+
 def liquid_land_count(deck_list, collection):
     avg_cmc = 0
     for name in deck_list:
@@ -163,20 +206,27 @@ def liquid_land_count(deck_list, collection):
         if card:
             avg_cmc += float(card.get('cmc', 0))
     avg_cmc /= len(deck_list)
-    target_lands = 37
-    if avg_cmc > 3.8:
-        target_lands = 40
-    elif avg_cmc > 3.4:
-        target_lands = 38
-    elif avg_cmc < 2.4:
-        target_lands = 35
-    elif avg_cmc < 2.0:
-        target_lands = 33
-    return target_lands
-
-
-def add_smart_lands(deck_list, collection, commander_name):
-    total_lands_needed = liquid_land_count(deck_list, collection)
+    return land_count_for_avg(avg_cmc)
+
+
+def simulated_land_count(deck_list, collection, commander_name):
+    """
+    Land count picked by the Monte Carlo simulator instead of the fixed
+    average-CMC cutoffs. Needs NumPy, so it is imported on demand.
+    """
+    from logic import manasim
+    return manasim.best_land_count(deck_list, collection, commander_name)
+
+
+def add_smart_lands(deck_list, collection, commander_name,
+                    land_count=None, simulate=False):
+    """
+    Adds non-basics, then basics by pip count. 'land_count' overrides the
+    liquid_land_count estimate; 'simulate' re-splits the basics with the
+    Monte Carlo simulator.
+    """
+    total_lands_needed = land_count or liquid_land_count(deck_list,
+                                                         collection)
     print(f"\n   🌍 MANA BASE ({total_lands_needed} slots)")
 
     # Phase 1: Non-Basics
@@ -192,4 +242,8 @@ def add_smart_lands(deck_list, collection, commander_name):
                              remaining_slots,
                              commander_name)
 
+    if simulate:
+        from logic import manasim
+        deck_list = manasim.tune_basics(deck_list, collection, commander_name)
+
     return deck_list, total_lands_needed
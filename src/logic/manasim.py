@@ -0,0 +1,382 @@
+"""
+Monte Carlo mana simulator. Shuffles a decklist many times at once as
+NumPy batches and measures how often spells are castable on each early
+turn, how often colors are missing, and how much mana a deck can spend.
+Used by lands.add_smart_lands to pick the land count and basic split
+instead of the fixed average-CMC cutoffs.
+
+Model (kept simple on purpose): one land drop per turn from the lands
+seen so far, lands tap for any one of their colors, a spell is castable
+when it has enough lands and at least as many sources of each color as it
+has pips of that color. Hybrid and Phyrexian symbols count as generic.
+"""
+import re
+
+import numpy as np
+
+from logic.lands import color_map
+
+COLORS = 'WUBRG'
+DECK_SIZE = 99
+HAND_SIZE = 7
+# best_land_count takes the fewest lands within this share of the best
+# mana spent (calibrated so typical curves land near the avg-CMC table)
+SPENT_TOLERANCE = 0.99
+
+basic_types = {'W': 'plains',
+               'U': 'island',
+               'B': 'swamp',
+               'R': 'mountain',
+               'G': 'forest'}
+# Basic land names as they appear in built decklists
+_basic_names = {name.lower(): code for code, name in color_map.items()}
+_basic_names.update({name: code for code, name in basic_types.items()})
+
+_symbol = re.compile(r'\{([^}]+)\}')
+
+
+def parse_pips(mana_cost):
+    """'{2}{U}{U}{B/G}' -> [0, 2, 0, 0, 0] (colored pips only)."""
+    pips = [0] * 5
+    for symbol in _symbol.findall(mana_cost or ''):
+        if symbol in COLORS:
+            pips[COLORS.index(symbol)] += 1
+    return pips
+
+
+def land_sources(card, cmd_colors):
+    """Returns the set of commander colors a land can produce."""
+    text = card.get('oracle_text', '')
+    lowered = text.lower()
+    type_line = card.get('type_line', '').lower()
+
+    if 'any color' in lowered or 'any one color' in lowered:
+        return set(cmd_colors)
+
+    colors = {c for c in COLORS if '{' + c + '}' in text}
+    for code, basic in basic_types.items():
+        # Typed duals (Land — Island Swamp) and fetches ("search ... forest")
+        if basic in type_line:
+            colors.add(code)
+        elif 'search your library' in lowered and basic in lowered:
+            colors.add(code)
+    return colors & set(cmd_colors)
+
+
+class DeckProfile:
+    """Per-card arrays for one decklist (commander excluded)."""
+
+    def __init__(self, is_land, sources, cmc, pips):
+        self.is_land = np.asarray(is_land, dtype=bool)
+        self.sources = np.asarray(sources, dtype=bool).reshape(-1, 5)
+        self.cmc = np.asarray(cmc, dtype=np.int16)
+        self.pips = np.asarray(pips, dtype=np.int16).reshape(-1, 5)
+
+    def __len__(self):
+        return len(self.is_land)
+
+
+def _card_row(name, collection, cmd_colors):
+    """(is_land, sources, cmc, pips) for one deck entry."""
+    code = _basic_names.get(name.lower())
+    if code is not None:
+        sources = [c == code and c in cmd_colors for c in COLORS]
+        return True, sources, 0, [0] * 5
+    if name.lower() == 'wastes':
+        return True, [False] * 5, 0, [0] * 5
+
+    card = collection._name_index.get(name.lower())
+    if card is None:
+        return False, [False] * 5, 0, [0] * 5
+    if 'land' in card.get('type_line', '').lower():
+        colors = land_sources(card, cmd_colors)
+        return True, [c in colors for c in COLORS], 0, [0] * 5
+    return (False, [False] * 5, int(float(card.get('cmc', 0))),
+            parse_pips(card.get('mana_cost', '')))
+
+
+def build_profile(deck_list, collection, commander_name):
+    cmd_obj = collection._name_index.get(commander_name.lower())
+    cmd_colors = set(cmd_obj.get('color_identity', [])) if cmd_obj else set()
+
+    rows = [_card_row(name, collection, cmd_colors) for name in deck_list
+            if name.lower() != commander_name.lower()]
+    if not rows:
+        return DeckProfile([], [], [], [])
+    is_land, sources, cmc, pips = zip(*rows)
+    return DeckProfile(is_land, sources, cmc, pips)
+
+
+def _draw_orders(n_cards, n_seen, games, rng):
+    """
+    Returns (games, n_seen) indexes of the first cards drawn from shuffled
+    decks. A partial Fisher-Yates shuffle: only the top 'n_seen' positions
+    are shuffled, one vectorized swap per position across all games.
+    """
+    dtype = np.uint8 if n_cards < 256 else np.int16
+    deck = np.tile(np.arange(n_cards, dtype=dtype), (games, 1))
+    rows = np.arange(games)
+    for i in range(n_seen):
+        j = rng.integers(i, n_cards, size=games)
+        picked = deck[rows, j]
+        deck[rows, j] = deck[:, i]
+        deck[:, i] = picked
+    return deck[:, :n_seen]
+
+
+def simulate(profile, games=100000, turns=7, seed=0, on_the_play=True):
+    """
+    Plays 'games' opening hands plus 'turns' turns of draws and land drops.
+
+    Returns a dict of per-turn arrays (index 0 is turn 1):
+        land_drop    P(made every land drop up to this turn)
+        castable     share of drawn spells with cmc <= turn that can be cast
+        color_screw  P(some drawn spell has enough lands but wrong colors)
+    and 'mana_spent', the mean mana spent by the last turn. Each turn adds
+    that turn's lands to the budget, capped by the total cost of castable
+    spells drawn so far, so both flood and screw lower it.
+    """
+    n_cards = len(profile)
+    draws = HAND_SIZE + turns - (1 if on_the_play else 0)
+    n_seen = min(draws, n_cards)
+    if n_seen == 0:
+        empty = np.zeros(turns)
+        return {'land_drop': empty, 'castable': empty,
+                'color_screw': empty, 'mana_spent': 0.0}
+
+    rng = np.random.default_rng(seed)
+    # Draw order first (turn-major) so each turn works on a contiguous
+    # block of rows: row i holds the i-th card drawn in every game
+    seen = np.ascontiguousarray(_draw_orders(n_cards, n_seen, games, rng).T)
+
+    is_land = profile.is_land[seen]
+    cmc = profile.cmc[seen]
+    pips = [profile.pips[:, c][seen] for c in range(5)]
+    spells = ~is_land
+    land_rank = np.cumsum(is_land, axis=0, dtype=np.int16)
+    # Sources of each color among the lands drawn up to each position
+    color_rank = [np.cumsum(profile.sources[:, c][seen] & is_land,
+                            axis=0, dtype=np.int16) for c in range(5)]
+    # Only colors some spell needs are checked
+    needs = [c for c in range(5) if profile.pips[:, c].any()]
+    games_idx = np.arange(games)
+
+    land_drop = np.zeros(turns)
+    castable = np.zeros(turns)
+    color_screw = np.zeros(turns)
+    spent = np.zeros(games, dtype=np.int32)
+
+    for t in range(1, turns + 1):
+        last = min(HAND_SIZE + t - (1 if on_the_play else 0), n_seen)
+        lands_seen = land_rank[last - 1]
+        mana = np.minimum(lands_seen, t)
+        land_drop[t - 1] = np.mean(lands_seen >= t)
+
+        # Lands on the battlefield are the first 'mana' lands drawn; find
+        # the position of the last of them and read its color totals
+        played_pos = np.minimum((land_rank[:last] < mana).sum(axis=0),
+                                last - 1)
+        has_land = mana > 0
+
+        drawn = spells[:last]
+        drawn_cmc = cmc[:last]
+        enough_lands = drawn & (drawn_cmc <= mana)
+        ok = enough_lands.copy()
+        for c in needs:
+            available = np.where(has_land,
+                                 color_rank[c][played_pos, games_idx], 0)
+            ok &= pips[c][:last] <= available
+
+        wanted = drawn & (drawn_cmc <= t)
+        n_wanted = wanted.sum()
+        if n_wanted:
+            castable[t - 1] = (wanted & ok).sum() / n_wanted
+        color_screw[t - 1] = np.mean((enough_lands & ~ok).any(axis=0))
+
+        castable_cost = np.where(ok, drawn_cmc, 0).sum(axis=0)
+        spent = np.minimum(spent + mana, castable_cost)
+
+    return {'land_drop': land_drop,
+            'castable': castable,
+            'color_screw': color_screw,
+            'mana_spent': float(np.mean(spent))}
+
+
+def best_land_count(deck_list, collection, commander_name,
+                    counts=range(30, 43), games=30000, turns=10, seed=0):
+    """
+    Searches the land count for the deck's curve. Each candidate deck is
+    DECK_SIZE cards: N lands that tap for any color, plus the spells of
+    'deck_list' resampled evenly along the curve to fill the rest. Every
+    count is played with the same seed so they compare fairly.
+
+    Mana spent alone keeps creeping up with more lands, since flood only
+    costs the spells a land displaces. So the pick is the fewest lands
+    that get within SPENT_TOLERANCE of the best mana spent: extra lands
+    are only added while they still buy a noticeable amount of mana.
+    """
+    profile = build_profile(deck_list, collection, commander_name)
+    cmc = np.sort(profile.cmc[~profile.is_land])
+    if len(cmc) == 0:
+        return _middle(counts)
+
+    spent = {}
+    for n_lands in counts:
+        n_spells = DECK_SIZE - n_lands
+        pick = np.linspace(0, len(cmc) - 1, n_spells).round().astype(int)
+        is_land = np.arange(DECK_SIZE) < n_lands
+        profile = DeckProfile(
+            is_land,
+            np.repeat(is_land[:, None], 5, axis=1),
+            np.concatenate([np.zeros(n_lands, dtype=np.int16), cmc[pick]]),
+            np.zeros((DECK_SIZE, 5), dtype=np.int16))
+        spent[n_lands] = simulate(profile, games, turns, seed)['mana_spent']
+
+    best = max(spent.values())
+    return min(n for n, value in spent.items()
+               if value >= SPENT_TOLERANCE * best)
+
+
+def _middle(counts):
+    """Middle of the search range, for decks with no spells to simulate."""
+    counts = list(counts)
+    return counts[len(counts) // 2]
+
+
+def _split_scores(base, cmd_colors, splits, games, turns, seed,
+                  on_the_play=True):
+    """
+    Scores several basic land splits of the same size on one shared set of
+    shuffles: mean castable share minus mean color screw, as in simulate.
+
+    The basics are appended to 'base' as numbered slots, and each split
+    only decides which color every slot taps for. Everything but the color
+    check (draws, land drops, which basics reach the battlefield) is
+    computed once, so each extra split costs one comparison per color.
+    """
+    n_basics = sum(splits[0].values())
+    n_base = len(base)
+    n_cards = n_base + n_basics
+    draws = HAND_SIZE + turns - (1 if on_the_play else 0)
+    n_seen = min(draws, n_cards)
+    if n_seen == 0 or n_base == 0:
+        return [0.0] * len(splits)
+
+    rng = np.random.default_rng(seed)
+    seen = np.ascontiguousarray(_draw_orders(n_cards, n_seen, games, rng).T)
+
+    base_rows = np.minimum(seen, n_base - 1)
+    in_base = seen < n_base
+    is_land = ~in_base | base.is_land[base_rows]
+    spells = ~is_land
+    cmc = np.where(in_base, base.cmc[base_rows], 0)
+    pips = [np.where(in_base, base.pips[base_rows, c], 0) for c in range(5)]
+    land_rank = np.cumsum(is_land, axis=0, dtype=np.int16)
+    # Sources from the non-basic lands; basic slots are counted per split
+    base_rank = [np.cumsum(in_base & is_land & base.sources[base_rows, c],
+                           axis=0, dtype=np.int16) for c in range(5)]
+    # Slot number of every basic drawn, n_basics for anything else
+    slot = np.where(in_base, n_basics, seen.astype(np.int32) - n_base)
+    needs = [c for c in range(5) if base.pips[:, c].any()]
+    games_idx = np.arange(games)
+
+    # Each color owns a contiguous range of slots in every split
+    bounds = []
+    for split in splits:
+        ranges, lo = {}, 0
+        for code in cmd_colors:
+            ranges[COLORS.index(code)] = (lo, lo + split[code])
+            lo += split[code]
+        bounds.append(ranges)
+
+    castable = np.zeros((len(splits), turns))
+    color_screw = np.zeros((len(splits), turns))
+    for t in range(1, turns + 1):
+        last = min(HAND_SIZE + t - (1 if on_the_play else 0), n_seen)
+        mana = np.minimum(land_rank[last - 1], t)
+        played_pos = np.minimum((land_rank[:last] < mana).sum(axis=0),
+                                last - 1)
+        has_land = mana > 0
+
+        # below[g, k]: basics with slot < k on game g's battlefield
+        on_field = (np.arange(last)[:, None] <= played_pos) & has_land
+        hist = np.bincount((games_idx * (n_basics + 1) + slot[:last])
+                           [on_field], minlength=games * (n_basics + 1))
+        below = np.zeros((games, n_basics + 2), dtype=np.int16)
+        np.cumsum(hist.reshape(games, n_basics + 1), axis=1,
+                  out=below[:, 1:])
+
+        drawn = spells[:last]
+        drawn_cmc = cmc[:last]
+        enough_lands = drawn & (drawn_cmc <= mana)
+        wanted = drawn & (drawn_cmc <= t)
+        n_wanted = wanted.sum()
+        base_available = {c: np.where(has_land,
+                                      base_rank[c][played_pos, games_idx], 0)
+                          for c in needs}
+
+        for i, ranges in enumerate(bounds):
+            ok = enough_lands.copy()
+            for c in needs:
+                lo, hi = ranges.get(c, (0, 0))
+                available = base_available[c] + below[:, hi] - below[:, lo]
+                ok &= pips[c][:last] <= available
+            if n_wanted:
+                castable[i, t - 1] = (wanted & ok).sum() / n_wanted
+            color_screw[i, t - 1] = np.mean((enough_lands & ~ok).any(axis=0))
+
+    return (castable.mean(axis=1) - color_screw.mean(axis=1)).tolist()
+
+
+def tune_basics(deck_list, collection, commander_name,
+                games=4000, turns=7, seed=0, max_moves=8):
+    """
+    Hill-climbs the basic land split, starting from the pip-proportional
+    split already in the deck: moves one basic at a time between commander
+    colors while the simulated castability improves. All the moves from a
+    split are scored together on the same shuffles.
+    Returns the decklist with the basics rewritten.
+    """
+    cmd_obj = collection._name_index.get(commander_name.lower())
+    cmd_colors = [c for c in COLORS
+                  if cmd_obj and c in cmd_obj.get('color_identity', [])]
+    if len(cmd_colors) < 2:
+        return deck_list
+
+    basics = {c: 0 for c in cmd_colors}
+    others = []
+    for name in deck_list:
+        code = _basic_names.get(name.lower())
+        if code in basics:
+            basics[code] += 1
+        else:
+            others.append(name)
+
+    base = build_profile(others, collection, commander_name)
+
+    for _ in range(max_moves):
+        moves = []
+        for src in cmd_colors:
+            if basics[src] == 0:
+                continue
+            for dst in cmd_colors:
+                if dst == src:
+                    continue
+                trial = dict(basics)
+                trial[src] -= 1
+                trial[dst] += 1
+                moves.append(trial)
+        if not moves:
+            break
+        scores = _split_scores(base, cmd_colors, [basics] + moves,
+                               games, turns, seed)
+        best = int(np.argmax(scores[1:]))
+        if scores[1 + best] <= scores[0]:
+            break
+        basics = moves[best]
+
+    print("      ~ Simulated basic split: " +
+          ", ".join(f"{basics[c]} {color_map[c]}" for c in cmd_colors))
+    for code in cmd_colors:
+        others.extend([color_map[code]] * basics[code])
+    return others
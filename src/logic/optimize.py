@@ -2,8 +2,44 @@ from logic.lands import color_map
 from logic.lands import liquid_land_count
 from logic.classifier import classify_card
 
+# Minimum number of cards per role in a finished deck
+QUOTAS = {"Ramp": 12, "Draw": 10, "Removal": 12, "Wipe": 2, "Recursion": 2}
 
-def optimize_deck(deck_data, collection, target_lands):
+
+def banned_phrases_for(cmd_colors):
+    """Text that only matters for colors outside the commander's identity."""
+    banned_phrases = []
+    for code, color_name in color_map.items():
+        if code not in cmd_colors:
+            banned_phrases.append(f"{color_name} spells you cast")
+            banned_phrases.append(f"{color_name} spells cost")
+            banned_phrases.append(f"{color_name} creatures you control")
+    return banned_phrases
+
+
+def candidate_cards(collection, current_list, commander_name, cmd_colors):
+    """Non-land cards that could join the deck, best EDHREC rank first."""
+    banned_phrases = banned_phrases_for(cmd_colors)
+    candidates = []
+    for card in collection.cards:
+        name = card["Name"]
+        if "Land" in card.get("type_line", ""):
+            continue
+        if name in current_list or name == commander_name:
+            continue
+        if not set(card.get("color_identity", [])).issubset(cmd_colors):
+            continue
+
+        text = card.get("oracle_text", "").lower()
+        if any(phrase in text for phrase in banned_phrases):
+            continue
+        candidates.append(card)
+
+    candidates.sort(key=lambda x: x.get("edhrec_rank", 99999))
+    return candidates
+
+
+def optimize_deck(deck_data, collection, target_lands, land_count=None):
     print(f"\n🏗️  DECK ASSEMBLY: {deck_data['commander']}")
     print("-" * 40)
 
@@ -14,16 +50,9 @@ def optimize_deck(deck_data, collection, target_lands):
     # 1. Surgical Filters
     cmd_obj = collection._name_index.get(commander_name.lower())
     cmd_colors = set(cmd_obj.get("color_identity", []))
-    banned_phrases = []
-
-    for code, color_name in color_map.items():
-        if code not in cmd_colors:
-            banned_phrases.append(f"{color_name} spells you cast")
-            banned_phrases.append(f"{color_name} spells cost")
-            banned_phrases.append(f"{color_name} creatures you control")
 
     # 2. Classify Existing
-    quotas = {"Ramp": 12, "Draw": 10, "Removal": 12, "Wipe": 2, "Recursion": 2}
+    quotas = QUOTAS
     current_stats = {k: 0 for k in quotas}
 
     for name in current_list:
@@ -40,22 +69,8 @@ def optimize_deck(deck_data, collection, target_lands):
     )
 
     # 3. Candidates
-    candidates = []
-    for card in collection.cards:
-        name = card["Name"]
-        if "Land" in card.get("type_line", ""):
-            continue
-        if name in current_list or name == commander_name:
-            continue
-        if not set(card.get("color_identity", [])).issubset(cmd_colors):
-            continue
-
-        text = card.get("oracle_text", "").lower()
-        if any(phrase in text for phrase in banned_phrases):
-            continue
-        candidates.append(card)
-
-    candidates.sort(key=lambda x: x.get("edhrec_rank", 99999))
+    candidates = candidate_cards(collection, current_list,
+                                 commander_name, cmd_colors)
 
     # 4. Fill Gaps
     added_log = []
@@ -82,12 +97,17 @@ def optimize_deck(deck_data, collection, target_lands):
             print(f"      {item}")
 
     # 5. Trim
-    max_non_lands = 99 - liquid_land_count(current_list, collection)
+    # 'land_count' (e.g. from the mana simulator) wins over the estimate
+    max_non_lands = 99 - (land_count or
+                          liquid_land_count(current_list, collection))
     while len(current_list) < max_non_lands:
         for card in candidates:
             if card["Name"] not in current_list:
                 current_list.add(card["Name"])
                 break
+        else:
+            # Collection ran out of playable cards
+            break
 
     if len(current_list) > max_non_lands:
         deck_objects = [
@@ -0,0 +1,88 @@
+"""
+Cheap pre-pass that bounds the best synergy score a commander could reach
+with the owned collection, so hopeless commanders never hit EDHREC.
+"""
+import time
+from collections import Counter
+
+# Cached theme sizes older than this are ignored, so a commander pruned by
+# a stale size gets fetched (and its entry refreshed) again
+THEME_SIZE_MAX_AGE = 14 * 24 * 3600
+
+
+def identity_counts(collection):
+    """
+    Counts distinct owned card names per color identity.
+    Unenriched cards are keyed under None (identity unknown).
+    """
+    counts = Counter()
+    for card in collection._name_index.values():
+        if 'color_identity' in card:
+            counts[frozenset(card['color_identity'])] += 1
+        else:
+            counts[None] += 1
+    return counts
+
+
+def cached_theme_size(theme_sizes, name, max_age=THEME_SIZE_MAX_AGE):
+    """
+    Largest theme list size cached for a commander, or None if there is
+    no entry or it is older than 'max_age' seconds.
+    """
+    entry = (theme_sizes or {}).get(name)
+    if not isinstance(entry, dict):
+        return None
+    if time.time() - entry.get('fetched', 0) > max_age:
+        return None
+    return entry.get('size')
+
+
+def record_theme_size(theme_sizes, name, size):
+    theme_sizes[name] = {'size': size, 'fetched': time.time()}
+
+
+def merge_theme_sizes(into, other):
+    """Folds 'other' into 'into', keeping the newer entry per commander."""
+    for name, entry in other.items():
+        if not isinstance(entry, dict):
+            continue
+        current = into.get(name)
+        if not isinstance(current, dict) or \
+                entry.get('fetched', 0) > current.get('fetched', 0):
+            into[name] = entry
+    return into
+
+
+def score_upper_bound(cmd, id_counts, theme_sizes=None):
+    """
+    A theme score is the number of distinct owned cards on an EDHREC list,
+    and EDHREC only lists cards legal in the commander's identity. So the
+    score can never exceed the owned cards inside that identity, nor the
+    largest theme list we have seen for this commander recently.
+    """
+    cmd_colors = set(cmd.get('color_identity', []))
+    bound = id_counts.get(None, 0)
+    for identity, count in id_counts.items():
+        if identity is not None and identity <= cmd_colors:
+            bound += count
+
+    cached = cached_theme_size(theme_sizes, cmd['Name'])
+    if cached is not None:
+        bound = min(bound, cached)
+    return bound
+
+
+def prune_commanders(commanders, collection, min_score, theme_sizes=None):
+    """
+    Splits commanders into (kept, skipped) by whether their upper bound
+    can reach 'min_score'.
+    """
+    id_counts = identity_counts(collection)
+    kept = []
+    skipped = []
+    for cmd in commanders:
+        if score_upper_bound(cmd, id_counts, theme_sizes) >= min_score:
+            kept.append(cmd)
+        else:
+            skipped.append(cmd)
+    return kept, skipped
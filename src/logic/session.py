@@ -0,0 +1,298 @@
+"""
+Stateful deck-building session for interactive edits. Roles, candidate
+order and pip totals, which optimize_deck and add_smart_lands recompute
+from scratch, are computed once and then updated per edit. Each edit
+re-settles the deck from those running totals instead of rebuilding it.
+"""
+import heapq
+from collections import Counter
+
+from logic import lands
+from logic.classifier import classify_card
+from logic.optimize import QUOTAS, candidate_cards, optimize_deck
+
+DECK_SIZE = 99
+# Land count re-estimates per edit; the avg-CMC table can flip between two
+# counts, so stop after this many
+SETTLE_ROUNDS = 3
+
+
+class DeckSession:
+    """
+    Holds one deck under construction.
+
+    The session starts from the spells optimize_deck picks, the same list
+    build_winner exports. Cards the user adds are locked (never trimmed);
+    cards the user removes are excluded (never re-added). Locked cards
+    can't take more than the spell slots, so add and swap raise ValueError
+    instead of producing a deck over 99.
+
+    Every edit resets the land count to the starting estimate and settles
+    the deck again: role gaps and free slots are filled from rank-ordered
+    pools (one per role plus a filler pool), the worst ranked cards are
+    trimmed, then the land count is re-derived from the result. Unlike
+    optimize_deck, which trims purely by EDHREC rank, the starting spells
+    outrank every other candidate here. That keeps the settle from
+    swapping them out, and since trimmed cards go back into the pools,
+    undoing an edit gives back the deck it started from.
+
+    Trimming here also keeps role quotas when it can, which optimize_deck
+    doesn't. The first settle therefore tops up any quota that
+    optimize_deck's trim left short, and fixes the 99-card total. Those
+    fills are the only way the starting deck differs from the exported
+    one.
+    """
+
+    def __init__(self, deck_data, collection, land_count=None):
+        self.collection = collection
+        self.commander = deck_data['commander']
+        self.role_map = deck_data.get('role_map', {})
+        self.fixed_land_count = land_count
+
+        cmd_obj = collection._name_index.get(self.commander.lower())
+        self.cmd_colors = set(cmd_obj.get('color_identity', []))
+
+        self.deck = []            # non-basic entries, insertion ordered
+        self.in_deck = set()
+        self.locked = set()
+        self.excluded = set()
+        self._roles = {}
+        self.role_counts = Counter()
+        self.pips = Counter()
+        self.cmc_total = 0.0
+
+        spells = optimize_deck(deck_data, collection, None, land_count)
+        for name in dict.fromkeys(spells):
+            if name != self.commander:
+                self._insert(name)
+        # The starting spells outrank any candidate, then EDHREC rank
+        self.original = set(self.in_deck)
+        self._ranks = {}
+
+        # Candidate pools: one heap per role plus a filler heap
+        self.role_pools = {role: [] for role in QUOTAS}
+        self.filler_pool = []
+        for card in candidate_cards(collection, self.in_deck,
+                                    self.commander, self.cmd_colors):
+            self._release(card['Name'])
+
+        # Non-basic lands don't depend on the spells, rank them once
+        self.land_pool = list(dict.fromkeys(
+            c['Name'] for c in lands.non_basic_pool([], collection,
+                                                    self.commander)))
+
+        # Every rebalance starts from this estimate, so the land count
+        # (and the deck) only depend on the edits, not on their history
+        self.start_lands = self.land_target
+        self.target_lands = self.start_lands
+        self._rebalance()
+
+    # --- bookkeeping ---
+
+    def _card(self, name):
+        return self.collection._name_index.get(name.lower())
+
+    def _role(self, name):
+        if name not in self._roles:
+            card = self._card(name)
+            self._roles[name] = (classify_card(card, self.role_map)
+                                 if card else None)
+        return self._roles[name]
+
+    def _is_land(self, name):
+        card = self._card(name)
+        return bool(card) and 'land' in card.get('type_line', '').lower()
+
+    def _insert(self, name):
+        self.deck.append(name)
+        self.in_deck.add(name)
+        self.role_counts[self._role(name)] += 1
+        card = self._card(name)
+        if card:
+            self.cmc_total += float(card.get('cmc', 0))
+            if not self._is_land(name):
+                self.pips.update(lands.card_pips(card))
+
+    def _delete(self, name):
+        self.deck.remove(name)
+        self.in_deck.discard(name)
+        self.role_counts[self._role(name)] -= 1
+        card = self._card(name)
+        if card:
+            self.cmc_total -= float(card.get('cmc', 0))
+            if not self._is_land(name):
+                self.pips.subtract(lands.card_pips(card))
+
+    def _rank(self, name):
+        if name not in self._ranks:
+            card = self._card(name)
+            rank = card.get('edhrec_rank', 99999) if card else 99999
+            self._ranks[name] = (name not in self.original, rank, name)
+        return self._ranks[name]
+
+    def _release(self, name):
+        """Puts a card (back) into the candidate pools."""
+        entry = (self._rank(name), name)
+        heapq.heappush(self.filler_pool, entry)
+        role = self._role(name)
+        if role in self.role_pools:
+            heapq.heappush(self.role_pools[role], entry)
+
+    def _peek(self, pool):
+        """Best ranked usable card of a pool, or None. Drops stale ones."""
+        while pool:
+            name = pool[0][1]
+            if name not in self.in_deck and name not in self.excluded:
+                return name
+            heapq.heappop(pool)
+        return None
+
+    def _pop(self, pool):
+        name = self._peek(pool)
+        if name is not None:
+            heapq.heappop(pool)
+        return name
+
+    # --- targets ---
+
+    @property
+    def land_target(self):
+        """Same rule as lands.liquid_land_count, from running totals."""
+        if self.fixed_land_count:
+            return self.fixed_land_count
+        return lands.land_count_for_avg(self.cmc_total /
+                                        max(1, len(self.deck)))
+
+    @property
+    def quota_gaps(self):
+        return {role: quota - self.role_counts[role]
+                for role, quota in QUOTAS.items()
+                if self.role_counts[role] < quota}
+
+    def _rebalance(self):
+        """Settles the deck for a land count, then re-derives the count."""
+        self.target_lands = self.start_lands
+        self._settle(DECK_SIZE - self.target_lands)
+        for _ in range(SETTLE_ROUNDS):
+            if self.land_target == self.target_lands:
+                break
+            self.target_lands = self.land_target
+            self._settle(DECK_SIZE - self.target_lands)
+
+        # Only locked cards survive trimming; if they still don't fit
+        # (the land count rose after the lock), they take basic slots
+        if len(self.deck) > DECK_SIZE - self.target_lands:
+            self.target_lands = DECK_SIZE - len(self.deck)
+            print(f"   Warning: locked cards leave room for only "
+                  f"{self.target_lands} lands.")
+
+    def _settle(self, spells):
+        # 1. Fill role gaps from each role's pool
+        for role, gap in self.quota_gaps.items():
+            for _ in range(gap):
+                name = self._pop(self.role_pools[role])
+                if name is None:
+                    break
+                self._insert(name)
+
+        # 2. Pad with the best remaining cards
+        while len(self.deck) < spells:
+            name = self._pop(self.filler_pool)
+            if name is None:
+                break
+            self._insert(name)
+
+        # 3. Trim worst ranked unlocked cards, keeping role quotas if we can
+        while len(self.deck) > spells:
+            victim = self._trim_choice()
+            if victim is None:
+                break
+            self._delete(victim)
+            self._release(victim)
+
+        # 4. Swap out cards that a pool card now outranks (e.g. role fills
+        #    no longer needed once an edit is undone)
+        while True:
+            victim = self._trim_choice()
+            best = self._peek(self.filler_pool)
+            if victim is None or best is None or \
+                    self._rank(best) >= self._rank(victim):
+                break
+            self._delete(victim)
+            self._release(victim)
+            self._insert(self._pop(self.filler_pool))
+
+    def _trim_choice(self):
+        unlocked = [n for n in self.deck if n not in self.locked]
+        safe = [n for n in unlocked
+                if self._role(n) not in QUOTAS
+                or self.role_counts[self._role(n)] > QUOTAS[self._role(n)]]
+        pool = safe or unlocked
+        return max(pool, key=self._rank) if pool else None
+
+    # --- edits ---
+
+    def _check_room(self, name, freed=None):
+        """Raises ValueError if locking 'name' overfills the spell slots."""
+        locked = self.locked - {freed} | {name}
+        slots = DECK_SIZE - self.target_lands
+        if len(locked) > slots:
+            raise ValueError(f"Can't lock {name}: {len(locked)} locked cards "
+                             f"but only {slots} spell slots")
+
+    def add(self, name):
+        """Locks a card into the deck."""
+        if not self._card(name):
+            raise KeyError(f"{name} is not in the collection")
+        self._check_room(name)
+        self.excluded.discard(name)
+        self.locked.add(name)
+        if name not in self.in_deck:
+            self._insert(name)
+        self._rebalance()
+        return self.decklist()
+
+    def remove(self, name):
+        """Takes a card out and keeps it out."""
+        self.locked.discard(name)
+        self.excluded.add(name)
+        if name in self.in_deck:
+            self._delete(name)
+        self._rebalance()
+        return self.decklist()
+
+    def swap(self, out_name, in_name):
+        if not self._card(in_name):
+            raise KeyError(f"{in_name} is not in the collection")
+        self._check_room(in_name, freed=out_name)
+        self.locked.discard(out_name)
+        self.excluded.add(out_name)
+        if out_name in self.in_deck:
+            self._delete(out_name)
+        self.excluded.discard(in_name)
+        self.locked.add(in_name)
+        if in_name not in self.in_deck:
+            self._insert(in_name)
+        self._rebalance()
+        return self.decklist()
+
+    # --- results ---
+
+    def mana_base(self):
+        """Returns (non-basic land names, [(basic name, qty), ...])."""
+        target = self.target_lands
+        non_basics = [n for n in self.land_pool
+                      if n not in self.in_deck and n not in self.excluded]
+        non_basics = non_basics[:target]
+        pip_counts = {c: self.pips[c] for c in lands.color_map}
+        basics, _ = lands.split_basics(pip_counts, self.cmd_colors,
+                                       target - len(non_basics))
+        return non_basics, basics
+
+    def decklist(self):
+        """Full 99 (commander excluded), like build_winner's decklist."""
+        non_basics, basics = self.mana_base()
+        full = self.deck + non_basics
+        for name, qty in basics:
+            full.extend([name] * qty)
+        return full
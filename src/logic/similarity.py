@@ -0,0 +1,100 @@
+"""
+Collapses near-duplicate candidates (sibling themes like "Artifacts" and
+"Treasure", partners sharing a theme) before deck building. Owned card
+sets get MinHash signatures, LSH banding finds likely pairs, and pairs are
+confirmed with the exact Jaccard similarity before being grouped.
+"""
+import hashlib
+import random
+
+NUM_HASHES = 64
+BANDS = 16  # 4 rows per band: pairs above ~0.5 Jaccard become candidates
+_PRIME = (1 << 61) - 1
+
+
+def _base_hash(name):
+    digest = hashlib.blake2b(name.lower().encode('utf-8'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'big')
+
+
+def _hash_params(num_hashes, seed=0):
+    rng = random.Random(seed)
+    return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(num_hashes)]
+
+
+def minhash_signature(names, params):
+    hashes = [_base_hash(n) for n in names]
+    if not hashes:
+        return [_PRIME] * len(params)
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in params]
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def collapse_candidates(candidates, threshold=0.8,
+                        num_hashes=NUM_HASHES, bands=BANDS):
+    """
+    Groups candidates whose owned decklists have Jaccard >= 'threshold'
+    and keeps the best of each group: the first one in the given order, so
+    pass candidates already ranked.
+    The kept candidate gets a 'variants' list describing the others.
+    Order of the survivors is preserved.
+    """
+    if len(candidates) < 2 or threshold > 1:
+        return candidates
+
+    params = _hash_params(num_hashes)
+    rows = num_hashes // bands
+    card_sets = [{n.lower() for n in c['decklist']} for c in candidates]
+
+    # LSH: candidates sharing any band bucket are compared exactly
+    buckets = {}
+    for i, cards in enumerate(card_sets):
+        sig = minhash_signature(cards, params)
+        for band in range(bands):
+            key = (band, tuple(sig[band * rows:(band + 1) * rows]))
+            buckets.setdefault(key, []).append(i)
+
+    parent = list(range(len(candidates)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    compared = set()
+    for members in buckets.values():
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                pair = (members[x], members[y])
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                if jaccard(card_sets[pair[0]],
+                           card_sets[pair[1]]) >= threshold:
+                    parent[find(pair[1])] = find(pair[0])
+
+    groups = {}
+    for i in range(len(candidates)):
+        groups.setdefault(find(i), []).append(i)
+
+    keep = set()
+    for members in groups.values():
+        best = min(members)
+        keep.add(best)
+        variants = [{'commander': candidates[i]['commander'],
+                     'theme': candidates[i]['theme'],
+                     'score': candidates[i]['score'],
+                     'similarity': round(jaccard(card_sets[best],
+                                                 card_sets[i]), 2)}
+                    for i in members if i != best]
+        if variants:
+            candidates[best]['variants'] = variants
+
+    return [c for i, c in enumerate(candidates) if i in keep]
@@ -0,0 +1,92 @@
+"""
+Weighted synergy scoring. Theme lists are turned into int32 card-ID arrays
+plus float32 weights built from EDHREC's synergy and inclusion numbers.
+A theme's weighted score is then one dot product against the collection's
+owned-card mask, and many themes score in one call with np.add.reduceat.
+"""
+import numpy as np
+
+# weight = SYNERGY_WEIGHT * max(synergy, 0) + INCLUSION_WEIGHT * inclusion
+SYNERGY_WEIGHT = 1.0
+INCLUSION_WEIGHT = 1.0
+
+
+class CardIds:
+    """Lowercase card name -> dense integer ID, shared by all themes."""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def lookup(self, names):
+        ids = np.empty(len(names), dtype=np.int32)
+        for i, name in enumerate(names):
+            key = name.lower()
+            card_id = self.ids.get(key)
+            if card_id is None:
+                card_id = self.ids[key] = len(self.names)
+                self.names.append(key)
+            ids[i] = card_id
+        return ids
+
+    def __len__(self):
+        return len(self.names)
+
+
+def theme_weights(synergy, inclusion):
+    """Per-card weights from the metric arrays kept by externals."""
+    synergy = np.asarray(synergy, dtype=np.float32)
+    inclusion = np.asarray(inclusion, dtype=np.float32)
+    return (SYNERGY_WEIGHT * np.maximum(synergy, 0)
+            + INCLUSION_WEIGHT * inclusion).astype(np.float32)
+
+
+# Shared so ID arrays cached on page dicts stay valid for every scorer
+CARD_IDS = CardIds()
+
+
+class WeightedScorer:
+    """
+    Scores theme lists against one collection. Theme arrays are built once
+    per page (cached on the page dict) and the owned mask grows as new
+    card IDs appear.
+    """
+
+    def __init__(self, collection, card_ids=CARD_IDS):
+        self.card_ids = card_ids
+        self.owned_names = set(collection._name_index)
+        self.owned = np.zeros(0, dtype=np.float32)
+
+    def _sync_mask(self):
+        known = len(self.owned)
+        if known < len(self.card_ids):
+            extra = [name in self.owned_names
+                     for name in self.card_ids.names[known:]]
+            self.owned = np.concatenate(
+                [self.owned, np.asarray(extra, dtype=np.float32)])
+
+    def arrays(self, page):
+        """(ids, weights) for a theme page from externals.fetch_theme_data."""
+        if '_arrays' not in page:
+            page['_arrays'] = (self.card_ids.lookup(page['cards']),
+                               theme_weights(page['synergy'],
+                                             page['inclusion']))
+        return page['_arrays']
+
+    def score_many(self, pages):
+        """Weighted scores for many theme pages in one vectorized pass."""
+        arrays = [self.arrays(page) for page in pages]
+        self._sync_mask()
+        sizes = [len(ids) for ids, _ in arrays]
+        if not arrays or not sum(sizes):
+            return np.zeros(len(arrays), dtype=np.float32)
+
+        ids = np.concatenate([a[0] for a in arrays])
+        weights = np.concatenate([a[1] for a in arrays])
+        contrib = weights * self.owned[ids]
+
+        # reduceat needs valid starts; empty themes are patched to 0 below
+        starts = np.cumsum([0] + sizes[:-1])
+        scores = np.add.reduceat(contrib, np.minimum(starts, len(ids) - 1))
+        scores[np.asarray(sizes) == 0] = 0.0
+        return scores
@@ -1,3 +1,4 @@
+import argparse
 import time
 import os
 import csv
@@ -5,10 +6,12 @@ import glob
 
 import src.output as output
 import src.externals as externals
-from loaders import configs
-from logic import (curve, lands, optimize)
+from loaders import cache, configs
+from logic import (curve, lands, optimize, prune, similarity)
 from logic import classifier
+from src.card import Card
 from src.collection import Collection
+from src.synergy_index import SynergyIndex
 
 # --- CONFIGURATION ---
 # Only log decks if they have at least this much synergy
@@ -16,60 +19,88 @@ MIN_SCAN_SCORE = 25
 # Only EXPORT decks if they have at least this much synergy
 VICTORY_THRESHOLD = 45
 MAX_EXPORT_COUNT = 5    # Maximum number of decks to build
+# Candidates whose owned decklists overlap at least this much (Jaccard)
+# are built once, the rest listed as variants. Above 1.0 disables it.
+SIMILARITY_THRESHOLD = 0.8
+EXPORT_DIRECTORY = "./manabox_export"
+BULK_JSON_PATH = "oracle-cards.json"
+# Pick land count and basic split with the Monte Carlo mana simulator
+# (needs NumPy) instead of the average-CMC table
+SIMULATE_MANA = False
+# Largest EDHREC theme list seen per commander (with fetch time), used to
+# prune scans until it expires (see prune.THEME_SIZE_MAX_AGE)
+THEME_SIZE_CACHE = "edhrec_theme_sizes.json"
+# Rank candidates by EDHREC synergy/inclusion weighted score instead of
+# the raw owned count (thresholds still use the count). Needs NumPy.
+WEIGHTED_SCORING = False
+# Card -> (commander, theme) index built from every scanned theme list.
+# Commanders skipped by pruning are never fetched, so they are not in it.
+SYNERGY_INDEX_PATH = "synergy_index.json"
+
+
+def load_csv_file(filename):
+    """
+    Loads a single CSV export and returns its rows as Card records.
+    Includes a fallback for when csv.Sniffer fails.
+    """
+    print(f"Loading {filename}...")
+    file_cards = []
+    try:
+        with open(filename, mode='r', encoding='utf-8-sig') as csvfile:
+            # Read a sample to guess format
+            sample = csvfile.read(2048)
+            csvfile.seek(0)
+
+            try:
+                dialect = csv.Sniffer().sniff(sample)
+            except csv.Error:
+                # FALLBACK: If Sniffer fails, force standard CSV (comma)
+                print("   Warning: Could not detect delimiter for "
+                      f"{filename}. Defaulting to comma.")
+                dialect = csv.excel
+
+            reader = csv.DictReader(csvfile, dialect=dialect)
+
+            # Clean up whitespace in keys/values and add to big list
+            for row in reader:
+                # Filter out empty keys that might happen
+                # from trailing commas
+                clean_row = {k.strip(): v.strip() for k,
+                             v in row.items() if k}
+                file_cards.append(Card.from_row(clean_row))
+
+        print(f"   -> Loaded {len(file_cards)} cards.")
+
+    except Exception as e:
+        print(f"Error loading {filename}: {e}")
+
+    return file_cards
+
+
+def find_csv_files(directory_path):
+    """Returns every .csv file in the export folder."""
+    return glob.glob(os.path.join(directory_path, "*.csv"))
 
 
 def load_collection_from_directory(directory_path):
     """
     Walks a directory, finds all .csv files, loads them, and combines them.
-    Includes a fallback for when csv.Sniffer fails.
     """
     all_cards = []
     # Find all CSV files in the folder
-    csv_files = glob.glob(os.path.join(directory_path, "*.csv"))
+    csv_files = find_csv_files(directory_path)
 
     print(f"Found {len(csv_files)} CSV files in '{directory_path}'")
 
     for filename in csv_files:
-        print(f"Loading {filename}...")
-        try:
-            with open(filename, mode='r', encoding='utf-8-sig') as csvfile:
-                # Read a sample to guess format
-                sample = csvfile.read(2048)
-                csvfile.seek(0)
-
-                try:
-                    dialect = csv.Sniffer().sniff(sample)
-                except csv.Error:
-                    # FALLBACK: If Sniffer fails, force standard CSV (comma)
-                    print("   Warning: Could not detect delimiter for "
-                          f"{filename}. Defaulting to comma.")
-                    dialect = csv.excel
-
-                reader = csv.DictReader(csvfile, dialect=dialect)
-
-                # Clean up whitespace in keys/values and add to big list
-                file_cards = []
-                for row in reader:
-                    # Filter out empty keys that might happen
-                    # from trailing commas
-                    clean_row = {k.strip(): v.strip() for k,
-                                 v in row.items() if k}
-                    file_cards.append(clean_row)
-
-                all_cards.extend(file_cards)
-                print(f"   -> Loaded {len(file_cards)} cards.")
-
-        except Exception as e:
-            print(f"Error loading {filename}: {e}")
+        all_cards.extend(load_csv_file(filename))
 
     print(f"Total cards loaded: {len(all_cards)}")
     return Collection(all_cards)
 
 
-def setup_environment():
-    """Loads the card collection and configuration rules."""
-    print("--- 1. ENVIRONMENT SETUP ---")
-
+def load_rules():
+    """Loads the classifier heuristics into the classifier module."""
     print("Loading configuration files...")
     # Load Logic Rules
     classifier.spell_heuristic_rules = configs.load_heuristics(os.path.join(
@@ -79,36 +110,61 @@ def setup_environment():
         "data",
         "land_heuristics.json"))
 
+
+def setup_environment():
+    """Loads the card collection and configuration rules."""
+    print("--- 1. ENVIRONMENT SETUP ---")
+
+    load_rules()
+
     # Load Collection
-    my_collection = load_collection_from_directory("./manabox_export")
-    my_collection.enrich_from_local_bulk("oracle-cards.json")
+    my_collection = load_collection_from_directory(EXPORT_DIRECTORY)
+    my_collection.enrich_from_local_bulk(BULK_JSON_PATH)
 
     return my_collection
 
 
-def analyze_single_commander(cmd, collection):
+def analyze_single_commander(cmd, collection, theme_sizes=None,
+                             source=externals, throttle=0.1, index=None,
+                             scorer=None):
     """
     Fetches themes for ONE commander and returns a list of
-    valid candidate decks.
+    valid candidate decks. If 'theme_sizes' is given, the largest theme
+    list seen for this commander is recorded in it.
+    'source' is anything with the externals fetch functions (e.g. an
+    EdhrecCache); 'throttle' is the pause between theme requests, skipped
+    when a cache answered without going to the network.
+    Every fetched list is also recorded in 'index' (a SynergyIndex).
+    With a 'scorer' (logic.weights.WeightedScorer) candidates also get a
+    'weighted_score'.
     """
     valid_candidates = []
+    valid_pages = []
 
     # Fetch EDHRec data
-    edh_data = externals.fetch_edhrec_data(cmd['Name'])
+    edh_data = source.fetch_edhrec_data(cmd['Name'])
 
     if not edh_data or not edh_data.get('themes'):
         return []
 
+    if index is not None and edh_data.get('generic_cards'):
+        index.add_theme(cmd['Name'], 'Generic', edh_data['generic_cards'])
+
+    list_sizes = []
+
     # Check top 10 themes
     for theme in edh_data['themes'][:10]:
-        # Unpack result (Safe handling if fetcher returns tuple or list)
-        fetch_result = externals.fetch_theme_cards(theme['slug'])
-
-        if isinstance(fetch_result, tuple):
-            perfect_list, role_map = fetch_result
-        else:
-            perfect_list = fetch_result
-            role_map = {}
+        before = getattr(source, 'requests_made', None)
+        page = source.fetch_theme_data(theme['slug'])
+        fetched = before is None or source.requests_made > before
+        perfect_list = page['cards']
+        role_map = page.get('role_map', {})
+
+        # Cards can appear under several headers, count each one once
+        perfect_list = list(dict.fromkeys(perfect_list))
+        list_sizes.append(len(perfect_list))
+        if index is not None and perfect_list:
+            index.add_theme(cmd['Name'], theme['name'], perfect_list)
 
         # Calculate Synergy
         owned_synergy = collection.intersection(perfect_list)
@@ -126,20 +182,78 @@ def analyze_single_commander(cmd, collection):
                 'decklist': owned_synergy,
                 'role_map': role_map
             })
+            valid_pages.append(page)
 
         # API Throttling
-        time.sleep(0.1)
+        if throttle and fetched:
+            time.sleep(throttle)
 
-    return valid_candidates
+    # An empty list means a failed fetch, don't let it shrink the bound
+    if theme_sizes is not None and list_sizes and min(list_sizes) > 0:
+        prune.record_theme_size(theme_sizes, cmd['Name'], max(list_sizes))
 
+    if scorer is not None and valid_candidates:
+        weighted = scorer.score_many(valid_pages)
+        for candidate, value in zip(valid_candidates, weighted):
+            candidate['weighted_score'] = round(float(value), 2)
+
+    return valid_candidates
 
-def run_analysis_pipeline(collection):
-    """Iterates through all Legendary Creatures to find matches."""
-    print("\n--- 2. ANALYSIS LOOP ---")
 
+def find_commanders(collection, min_score, theme_sizes=None, shard=None):
+    """
+    Returns the owned Legendary Creatures, sorted by name, whose best
+    possible score can reach 'min_score'.
+    'shard' is an (index, count) pair; the partition is taken before
+    pruning so it doesn't move when the theme size cache changes.
+    """
     commanders = collection.filter(type_line="Legendary Creature")
     commanders.sort(key=lambda x: x['Name'])
 
+    if shard:
+        index, count = shard
+        commanders = commanders[index::count]
+
+    commanders, skipped = prune.prune_commanders(commanders,
+                                                 collection,
+                                                 min_score,
+                                                 theme_sizes)
+    if skipped:
+        print(f"Pruned {len(skipped)} commanders that cannot reach "
+              f"score {min_score}.")
+    return commanders
+
+
+def weighted_scorer(collection):
+    """A WeightedScorer when WEIGHTED_SCORING is on, None otherwise."""
+    if not WEIGHTED_SCORING:
+        return None
+    from logic import weights
+    return weights.WeightedScorer(collection)
+
+
+def run_analysis_pipeline(collection, min_score=VICTORY_THRESHOLD,
+                          source=externals, throttle=0.1, index=None):
+    """
+    Iterates through all Legendary Creatures to find matches.
+    Commanders whose best possible score is below 'min_score' are
+    skipped without fetching anything.
+    Fetched theme lists go into 'index'. Without one, the saved synergy
+    index is loaded, synced to this collection and saved afterwards; a
+    caller passing its own index is responsible for saving it.
+    """
+    print("\n--- 2. ANALYSIS LOOP ---")
+
+    theme_sizes = cache.load_cache(THEME_SIZE_CACHE)
+    commanders = find_commanders(collection, min_score, theme_sizes)
+
+    owns_index = index is None
+    if owns_index:
+        index = SynergyIndex.load(SYNERGY_INDEX_PATH)
+        index.sync_owned(collection)
+
+    scorer = weighted_scorer(collection)
+
     total = len(commanders)
     print(f"Scanning {total} commanders...")
 
@@ -148,15 +262,22 @@ def run_analysis_pipeline(collection):
     for i, cmd in enumerate(commanders):
         print(f"[{i+1}/{total}] Analyzing {cmd['Name']}...")
 
-        candidates = analyze_single_commander(cmd, collection)
+        candidates = analyze_single_commander(cmd, collection, theme_sizes,
+                                              source, throttle, index,
+                                              scorer)
         all_candidates.extend(candidates)
 
+    cache.save_cache(THEME_SIZE_CACHE, theme_sizes)
+    if owns_index:
+        index.save(SYNERGY_INDEX_PATH)
+
     return all_candidates
 
 
-def build_winner(candidate, collection):
+def build_winner(candidate, collection, output_dir=None):
     """
     Takes the winning candidate, runs the optimization logic, and exports.
+    The deck file goes to 'output_dir' (default: working directory).
     """
     print("\n--- 3. DECK CONSTRUCTION ---")
 
@@ -164,15 +285,25 @@ def build_winner(candidate, collection):
     target_lands, avg_cmc = curve.analyze_curve(candidate['decklist'],
                                                 collection)
 
+    # Simulated land count is computed once so both steps agree on it
+    land_count = None
+    if SIMULATE_MANA:
+        land_count = lands.simulated_land_count(candidate['decklist'],
+                                                collection,
+                                                candidate['commander'])
+
     # 2. Optimize (Add Staples / Cut Chaff)
     spell_list = optimize.optimize_deck(candidate,
                                         collection,
-                                        target_lands)
+                                        target_lands,
+                                        land_count)
 
     # 3. Add Lands (Pip Logic)
     full_decklist, target_lands = lands.add_smart_lands(spell_list,
                                                         collection,
-                                                        candidate['commander'])
+                                                        candidate['commander'],
+                                                        land_count,
+                                                        SIMULATE_MANA)
 
     # Update Object
     candidate['decklist'] = full_decklist
@@ -183,11 +314,71 @@ def build_winner(candidate, collection):
     safe_name = candidate['commander'].replace(" ", "_").replace(",", "")
     safe_theme = candidate['theme'].replace(" ", "_")
     filename = f"{safe_name}_{safe_theme}.txt"
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        filename = os.path.join(output_dir, filename)
 
     output.export_archidekt_txt(filename, candidate, collection)
 
+    return candidate
+
+
+def shard_arg(spec):
+    """argparse type for --shard, so bad specs fail before any loading."""
+    import src.shards as shards
+    try:
+        return shards.parse_shard(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Bulk Commander deck builder")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run as a long-lived local HTTP server")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="Port for --serve (binds to localhost)")
+    parser.add_argument("--batch", nargs="+", metavar="EXPORT_DIR",
+                        help="Score many ManaBox export folders against "
+                             "shared EDHREC and Scryfall data")
+    parser.add_argument("--output", default="batch_output",
+                        help="Root folder for --batch deck files")
+    parser.add_argument("--shard", metavar="I/N", type=shard_arg,
+                        help="Scan only shard I of N (0-based), "
+                             "checkpointing to scan_shard_I_of_N.json")
+    parser.add_argument("--merge", nargs="+", metavar="CHECKPOINT",
+                        help="Merge shard checkpoints and build the winners")
+    parser.add_argument("--unlocks", nargs="+", metavar="CARD",
+                        help="Show the themes gained by these cards (names "
+                             "or .csv exports), using the synergy index. "
+                             "Only commanders scanned so far are covered; "
+                             "pruned ones are not")
+    args = parser.parse_args()
+
+    if args.unlocks:
+        report_unlocks(args.unlocks)
+        return
+
+    if args.shard or args.merge:
+        import src.shards as shards
+        my_collection = setup_environment()
+        if args.shard:
+            shards.run_shard(my_collection, *args.shard)
+        else:
+            candidates = shards.merge_checkpoints(args.merge)
+            build_winners(candidates, my_collection)
+        return
+
+    if args.batch:
+        import src.batch as batch
+        batch.run_batch(args.batch, args.output)
+        return
+
+    if args.serve:
+        import src.server as server
+        server.serve(port=args.port)
+        return
+
     # 1. Setup
     my_collection = setup_environment()
 
@@ -195,20 +386,61 @@ def main():
     candidates = run_analysis_pipeline(my_collection)
 
     # 3. Filter & Build Winners
+    build_winners(candidates, my_collection)
+
+
+def report_unlocks(cards, top=10):
+    """
+    Answers "what does this new card unlock" from the saved synergy index
+    and the current collection, without touching EDHREC.
+    The index holds the theme lists of every commander a full scan, batch
+    or shard merge has fetched. Commanders the scan pruned (their best
+    possible score was below the threshold) or never reached are missing,
+    so cards that only help those commanders report no gains.
+    """
+    names = []
+    for entry in cards:
+        if entry.lower().endswith(".csv"):
+            names.extend(c['Name'] for c in load_csv_file(entry)
+                         if 'Name' in c)
+        else:
+            names.append(entry)
+
+    index = SynergyIndex.load(SYNERGY_INDEX_PATH)
+    if not index.themes:
+        print(f"❌ {SYNERGY_INDEX_PATH} is empty, run a scan first.")
+        return
+
+    index.sync_owned(load_collection_from_directory(EXPORT_DIRECTORY))
+    output.print_unlocks(index.gains(names, top), len(names))
+
+
+def build_winners(candidates, collection, output_dir=None):
+    """Ranks the candidates and builds the ones that make the cut."""
     if candidates:
         # Sort Highest Score First
-        candidates.sort(key=lambda x: x['score'], reverse=True)
+        rank_key = 'weighted_score' if WEIGHTED_SCORING else 'score'
+        candidates.sort(key=lambda x: x.get(rank_key, x['score']),
+                        reverse=True)
 
         # LOGIC: Top 5 OR Score > 45 (Whichever is least / Intersection)
-        # 1. Filter out anything below the Victory Threshold
+        # 1. Filter out anything below the Victory Threshold, before
+        #    collapsing so a group's kept deck is always one that qualifies
         high_quality = [c for c in candidates
                         if c['score'] >= VICTORY_THRESHOLD]
 
+        # Build only the best of each group of near-identical decks
+        distinct = similarity.collapse_candidates(high_quality,
+                                                  SIMILARITY_THRESHOLD)
+        collapsed = len(high_quality) - len(distinct)
+
         # 2. Take the Top 5 of the survivors
-        winners = high_quality[:MAX_EXPORT_COUNT]
+        winners = distinct[:MAX_EXPORT_COUNT]
 
         print("\n--- 3. RESULTS ---")
         print(f"Found {len(candidates)} valid themes.")
+        if collapsed:
+            print(f"Collapsed {collapsed} near-duplicate themes.")
         print(f"Filtered to {len(high_quality)} "
               f"above score {VICTORY_THRESHOLD}.")
         print(f"Exporting top {len(winners)}...")
@@ -218,7 +450,7 @@ def main():
                   f"of {VICTORY_THRESHOLD}.")
 
         for winner in winners:
-            build_winner(winner, my_collection)
+            build_winner(winner, collection, output_dir)
 
     else:
         print("\n❌ No viable decks found matching initial criteria.")
@@ -22,9 +22,25 @@ def print_deck_summary(deck_data, target_lands, avg_cmc):
     print(f"    Total:     {total_cards} Cards")
     print(f"    Lands:     {target_lands} slots")
     print(f"    Avg CMC:   {avg_cmc:.2f}")
+    for variant in deck_data.get('variants', []):
+        print(f"    Variant:   {variant['commander']} / {variant['theme']} "
+              f"(Score: {variant['score']}, "
+              f"{variant['similarity']:.0%} overlap)")
     print("="*60 + "\n")
 
 
+def print_unlocks(gains, card_count):
+    """Prints the themes that gain the most from a batch of new cards."""
+    print(f"\n🔓  THEMES GAINED BY {card_count} CARDS")
+    print("-" * 60)
+    if not gains:
+        print("    No indexed theme uses these cards.")
+    for g in gains:
+        print(f"    +{g['gain']:<3} {g['commander']} / {g['theme']} "
+              f"({g['before']} -> {g['after']} of {g['size']})")
+    print()
+
+
 # --- FILE EXPORT ---
 
 def export_archidekt_txt(filename, deck_data, collection):
@@ -0,0 +1,158 @@
+"""
+Long-running server mode. Keeps the enriched collection, the Scryfall bulk
+index, fetched EDHREC pages and the heuristic rules in memory so
+interactive requests skip the multi-second cold start of a normal run.
+
+Endpoints (localhost only):
+    GET  /score?commander=NAME            -> candidate themes for a commander
+    GET  /build?commander=NAME&theme=NAME -> builds and exports one deck
+    POST /reload                          -> re-reads changed CSV exports
+"""
+import json
+import os
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import src.main as pipeline
+import src.externals as externals
+from src.collection import Collection, load_bulk_index
+
+
+class DeckServer:
+    """Holds the hot state shared by every request."""
+
+    def __init__(self, export_dir, bulk_json_path):
+        self.export_dir = export_dir
+        self.bulk_index = load_bulk_index(bulk_json_path) or {}
+        # filename -> (mtime, rows) so reloads only touch changed files
+        self.file_cache = {}
+        # commander (lowercase) -> last scored candidates
+        self.candidates = {}
+        # EDHREC pages don't depend on the collection, keep them across
+        # reloads so repeat requests never touch the network
+        self.pages = externals.EdhrecCache()
+        self.collection = Collection([])
+
+        pipeline.load_rules()
+        self.reload()
+
+    def reload(self):
+        """
+        Re-reads only the CSV files that were added or modified since the
+        last load, and drops files that were deleted.
+        """
+        csv_files = pipeline.find_csv_files(self.export_dir)
+        changed = []
+        fresh_rows = []
+
+        for filename in csv_files:
+            mtime = os.path.getmtime(filename)
+            cached = self.file_cache.get(filename)
+            if cached and cached[0] == mtime:
+                continue
+            rows = pipeline.load_csv_file(filename)
+            self.file_cache[filename] = (mtime, rows)
+            fresh_rows.extend(rows)
+            changed.append(filename)
+
+        removed = [f for f in self.file_cache if f not in csv_files]
+        for filename in removed:
+            del self.file_cache[filename]
+
+        if not changed and not removed:
+            return {'changed': [], 'removed': [],
+                    'total': len(self.collection.cards)}
+
+        all_cards = []
+        for _, rows in self.file_cache.values():
+            all_cards.extend(rows)
+
+        collection = Collection(all_cards)
+        # Old rows were enriched on a previous load, only merge new ones
+        collection.enrich_from_bulk_index(self.bulk_index, cards=fresh_rows)
+        self.collection = collection
+        self.candidates = {}
+
+        print(f"Reload: {len(changed)} changed, {len(removed)} removed, "
+              f"{len(all_cards)} cards total.")
+        return {'changed': changed, 'removed': removed,
+                'total': len(all_cards)}
+
+    def score(self, commander_name):
+        cmd = self.collection._name_index.get(commander_name.lower())
+        if not cmd:
+            return None
+        candidates = pipeline.analyze_single_commander(cmd, self.collection,
+                                                       source=self.pages)
+        self.candidates[commander_name.lower()] = candidates
+        return candidates
+
+    def build(self, commander_name, theme_name):
+        candidates = self.candidates.get(commander_name.lower())
+        if candidates is None:
+            candidates = self.score(commander_name)
+        if not candidates:
+            return None
+
+        for candidate in candidates:
+            if candidate['theme'].lower() == theme_name.lower():
+                # build_winner rewrites the decklist, keep the scored copy
+                return pipeline.build_winner(dict(candidate), self.collection)
+        return None
+
+
+def _make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            commander = query.get('commander')
+
+            if url.path == '/score' and commander:
+                result = state.score(commander)
+                if result is None:
+                    self._reply(404, {'error': f"{commander} not owned"})
+                else:
+                    self._reply(200, {'candidates': result})
+            elif url.path == '/build' and commander and 'theme' in query:
+                result = state.build(commander, query['theme'])
+                if result is None:
+                    self._reply(404, {'error': "No viable candidate for "
+                                      f"{commander} / {query['theme']}"})
+                else:
+                    self._reply(200, result)
+            else:
+                self._reply(400, {'error': f"Unknown request {self.path}"})
+
+        def do_POST(self):
+            if urlparse(self.path).path == '/reload':
+                self._reply(200, state.reload())
+            else:
+                self._reply(400, {'error': f"Unknown request {self.path}"})
+
+    return Handler
+
+
+def serve(port=8765, export_dir=None, bulk_json_path=None):
+    """Loads everything once, then answers requests until interrupted."""
+    print("--- SERVER MODE ---")
+    state = DeckServer(export_dir or pipeline.EXPORT_DIRECTORY,
+                       bulk_json_path or pipeline.BULK_JSON_PATH)
+
+    # Single threaded on purpose: reloads swap the collection under us
+    httpd = HTTPServer(('127.0.0.1', port), _make_handler(state))
+    print(f"Listening on http://127.0.0.1:{port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        httpd.server_close()
@@ -0,0 +1,144 @@
+"""
+Sharded, resumable scanning. Each shard scans a deterministic slice of the
+sorted commander list and checkpoints its progress, so a crash only loses
+the last few commanders. 'merge_checkpoints' combines finished shards into
+the candidate list that feeds the build stage.
+
+Shards only read the shared theme size cache. The sizes they record are
+kept in their own checkpoint and folded into the cache by the merge, so
+parallel shards never overwrite each other's entries. The same goes for
+the synergy index: each shard writes its own index file and the merge
+adds them to the main one.
+"""
+import os
+
+import src.main as pipeline
+from loaders import cache
+from logic import prune
+from src.synergy_index import SynergyIndex
+
+# Save progress after this many commanders
+CHECKPOINT_EVERY = 5
+
+
+def parse_shard(spec):
+    """'2/8' -> (2, 8). Shard indexes are 0-based."""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Bad shard spec '{spec}', expected I/N") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Bad shard spec '{spec}', need 0 <= I < N")
+    return index, count
+
+
+def checkpoint_path(index, count):
+    return f"scan_shard_{index}_of_{count}.json"
+
+
+def index_path(checkpoint):
+    """Synergy index file written next to a shard checkpoint."""
+    return f"{os.path.splitext(checkpoint)[0]}_index.json"
+
+
+def run_shard(collection, index, count, path=None,
+              min_score=pipeline.VICTORY_THRESHOLD):
+    """
+    Scans shard 'index' of 'count', resuming from its checkpoint file.
+    Returns the shard's candidates.
+    """
+    path = path or checkpoint_path(index, count)
+    spec = f"{index}/{count}"
+    print(f"\n--- 2. ANALYSIS LOOP (shard {spec}) ---")
+
+    state = cache.load_cache(path, {'shard': spec,
+                                    'complete': False,
+                                    'done': [],
+                                    'candidates': [],
+                                    'theme_sizes': {}})
+    if state.get('shard') != spec:
+        raise ValueError(f"{path} belongs to shard {state.get('shard')}, "
+                         f"not {spec}")
+    done = set(state['done'])
+    if done:
+        print(f"Resuming from {path}: {len(done)} commanders already done.")
+
+    shard_index = SynergyIndex.load(index_path(path))
+    shard_sizes = state.setdefault('theme_sizes', {})
+    theme_sizes = cache.load_cache(pipeline.THEME_SIZE_CACHE)
+    prune.merge_theme_sizes(theme_sizes, shard_sizes)
+    commanders = pipeline.find_commanders(collection, min_score, theme_sizes,
+                                          shard=(index, count))
+    todo = [cmd for cmd in commanders if cmd['Name'] not in done]
+    scorer = pipeline.weighted_scorer(collection)
+
+    total = len(todo)
+    print(f"Scanning {total} commanders...")
+
+    for i, cmd in enumerate(todo):
+        print(f"[{i+1}/{total}] Analyzing {cmd['Name']}...")
+
+        candidates = pipeline.analyze_single_commander(cmd, collection,
+                                                       theme_sizes,
+                                                       index=shard_index,
+                                                       scorer=scorer)
+        state['candidates'].extend(candidates)
+        state['done'].append(cmd['Name'])
+        if cmd['Name'] in theme_sizes:
+            shard_sizes[cmd['Name']] = theme_sizes[cmd['Name']]
+
+        if (i + 1) % CHECKPOINT_EVERY == 0:
+            # Index first: a commander marked done must be in it
+            shard_index.save(index_path(path))
+            cache.save_cache(path, state)
+
+    state['complete'] = True
+    shard_index.save(index_path(path))
+    cache.save_cache(path, state)
+    print(f"Shard {spec} complete: {len(state['candidates'])} candidates "
+          f"saved to {path}")
+
+    return state['candidates']
+
+
+def merge_checkpoints(paths):
+    """
+    Combines shard checkpoints into one candidate list, and folds their
+    theme sizes and synergy indexes into the shared files.
+    Warns about unfinished or missing shards instead of failing, so a
+    partial merge is still possible.
+    """
+    print("\n--- 2. MERGING SHARDS ---")
+    seen_shards = set()
+    counts = set()
+    merged = {}
+    theme_sizes = cache.load_cache(pipeline.THEME_SIZE_CACHE)
+    synergy = SynergyIndex.load(pipeline.SYNERGY_INDEX_PATH)
+
+    for path in paths:
+        state = cache.load_cache(path)
+        if not state:
+            print(f"   Warning: could not read {path}, skipping.")
+            continue
+        index, count = parse_shard(state['shard'])
+        seen_shards.add(index)
+        counts.add(count)
+        if not state.get('complete'):
+            print(f"   Warning: shard {state['shard']} is not complete.")
+
+        for candidate in state['candidates']:
+            merged[(candidate['commander'], candidate['theme'])] = candidate
+        prune.merge_theme_sizes(theme_sizes, state.get('theme_sizes', {}))
+        synergy.merge(SynergyIndex.load(index_path(path)))
+
+    if len(counts) > 1:
+        print(f"   Warning: mixing shard counts {sorted(counts)}.")
+    elif counts:
+        missing = set(range(counts.pop())) - seen_shards
+        if missing:
+            print(f"   Warning: missing shards {sorted(missing)}.")
+
+    cache.save_cache(pipeline.THEME_SIZE_CACHE, theme_sizes)
+    synergy.save(pipeline.SYNERGY_INDEX_PATH)
+    print(f"Merged {len(merged)} candidates from {len(paths)} shards.")
+    return list(merged.values())
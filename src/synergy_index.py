@@ -0,0 +1,114 @@
+from collections import Counter
+
+from loaders import cache
+
+
+# --- SYNERGY INDEX ---
+class SynergyIndex:
+    """
+    Inverted index from card name to the EDHREC (commander, theme) lists
+    it appears on, with the owned count of every theme kept up to date.
+    Adding or removing cards only touches that card's postings, so
+    "what does this purchase unlock" is a lookup instead of a rescan.
+    Card names are stored lowercase, like Collection._name_index.
+    """
+
+    def __init__(self):
+        self.postings = {}  # card -> set of (commander, theme)
+        self.themes = {}    # (commander, theme) -> list of cards
+        self.owned_counts = Counter()
+        self.owned = set()
+
+    def add_theme(self, commander, theme, card_names):
+        """Records (or refreshes) one theme list."""
+        key = (commander, theme)
+        if key in self.themes:
+            self._drop_theme(key)
+
+        cards = list(dict.fromkeys(n.lower() for n in card_names))
+        self.themes[key] = cards
+        for card in cards:
+            self.postings.setdefault(card, set()).add(key)
+        self.owned_counts[key] = sum(1 for c in cards if c in self.owned)
+
+    def _drop_theme(self, key):
+        for card in self.themes.pop(key):
+            keys = self.postings.get(card)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[card]
+        del self.owned_counts[key]
+
+    def add_cards(self, names):
+        """Marks cards as owned. Returns the themes whose count changed."""
+        touched = Counter()
+        for name in {n.lower() for n in names} - self.owned:
+            self.owned.add(name)
+            for key in self.postings.get(name, ()):
+                self.owned_counts[key] += 1
+                touched[key] += 1
+        return touched
+
+    def remove_cards(self, names):
+        """Marks cards as no longer owned. Returns the changed themes."""
+        touched = Counter()
+        for name in {n.lower() for n in names} & self.owned:
+            self.owned.discard(name)
+            for key in self.postings.get(name, ()):
+                self.owned_counts[key] -= 1
+                touched[key] -= 1
+        return touched
+
+    def sync_owned(self, collection):
+        """Applies the difference between the index and a collection."""
+        current = set(collection._name_index)
+        self.remove_cards(self.owned - current)
+        self.add_cards(current - self.owned)
+
+    def merge(self, other):
+        """Copies every theme list of 'other' into this index."""
+        for (commander, theme), cards in other.themes.items():
+            self.add_theme(commander, theme, cards)
+
+    def score(self, commander, theme):
+        return self.owned_counts.get((commander, theme), 0)
+
+    def gains(self, names, top=10):
+        """
+        Top themes gained by acquiring 'names', without changing the index.
+        Returns dicts with commander, theme, old/new score and list size.
+        """
+        gained = Counter()
+        for name in {n.lower() for n in names} - self.owned:
+            for key in self.postings.get(name, ()):
+                gained[key] += 1
+
+        results = []
+        for key, gain in gained.items():
+            before = self.owned_counts[key]
+            results.append({'commander': key[0],
+                            'theme': key[1],
+                            'gain': gain,
+                            'before': before,
+                            'after': before + gain,
+                            'size': len(self.themes[key])})
+        results.sort(key=lambda r: (r['gain'], r['after']), reverse=True)
+        return results[:top]
+
+    def save(self, filepath):
+        cache.save_cache(filepath, {
+            'themes': [{'commander': c, 'theme': t, 'cards': cards}
+                       for (c, t), cards in self.themes.items()],
+            'owned': sorted(self.owned),
+        })
+
+    @classmethod
+    def load(cls, filepath):
+        data = cache.load_cache(filepath)
+        index = cls()
+        index.owned = set(data.get('owned', []))
+        for entry in data.get('themes', []):
+            index.add_theme(entry['commander'], entry['theme'],
+                            entry['cards'])
+        return index